@@ -4,16 +4,137 @@ Single API call instead of 4 parallel calls
 Uses GPT-3.5-Turbo by default (10x cheaper than GPT-4)
 """
 
-from typing import TypedDict, Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import TypedDict, Dict, Any, List, Tuple
+import httpx
+import numpy as np
+import tenacity
+import tiktoken
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.messages import HumanMessage, SystemMessage
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+import asyncio
+import bisect
+import difflib
+import functools
+import hashlib
 import json
 import os
+import re
+import string
 from dotenv import load_dotenv
 
+try:
+    # 2-5x faster than stdlib json on parse; worthwhile for batch flows
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
 
+def _loads(content: str) -> Any:
+    """Parse JSON with orjson when available, stdlib json otherwise"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+# Static rubric + schema, declared once at module load. Keeping this prefix
+# byte-identical across calls (long static part FIRST, variable fields LAST)
+# lets OpenAI's automatic prompt caching discount the repeated prefix.
+RUBRIC_PROMPT = """You are an expert child literacy assessor.
+Score each numbered submission 0-100 on: intent (grasp of the main concept), vocabulary (age-appropriate word choice), spelling (credit phonetic attempts like "becaus"->"because"), grammar (structure, tense, agreement).
+Return a JSON object with one entry per submission:
+{"results":[{"id":1,"intent":{"s":0-100,"u":true/false,"cr":[],"cm":[],"n":""},"vocabulary":{"s":0-100,"gw":[],"im":[],"n":""},"spelling":{"s":0-100,"er":[{"word":"","correct":"","type":"phonetic/typo"}],"pt":[],"n":""},"grammar":{"s":0-100,"er":[{"type":"","fix":""}],"st":[],"n":""}}]}
+Legend: s=score, u=understood, cr=concepts right, cm=concepts missed, gw=good words, im=improvements, er=errors, pt=phonetic attempts, st=strengths, n=brief note"""
+
+# Appended to the rubric when model routing is on: the cheap model reports
+# how sure it is, so borderline cases can be re-graded by the strong model
+CONFIDENCE_ADDENDUM = """
+Also include in each object "c":0-100, your confidence in the evaluation (c=confidence)."""
+
+# Built once at import so every evaluator instance sends the exact same
+# system message object — the human message carries only per-call fields
+_SYSTEM_MSG = SystemMessage(content=RUBRIC_PROMPT)
+_SYSTEM_MSG_CONFIDENCE = SystemMessage(content=RUBRIC_PROMPT + CONFIDENCE_ADDENDUM)
+
+# Per-submission block, precompiled once and substituted in the hot path
+SUBMISSION_TEMPLATE = string.Template("""Submission $i:
+QUESTION: $question
+CORRECT ANSWER: $correct
+STUDENT'S ANSWER: $student
+DIFFICULTY: $difficulty
+CONTEXT: $context""")
+
+def _clean(text: Any) -> str:
+    """Collapse whitespace runs and newlines — every run costs tokens"""
+    return " ".join(str(text).split())
+
+
+# Hard per-field token budgets: a pasted-in essay or HTML dump in any one
+# field must not bloat the prompt or overflow the context window
+_CONTEXT_TOKEN_CAP = 512
+_ANSWER_TOKEN_CAP = 350
+_CORRECT_TOKEN_CAP = 120
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model_name: str) -> "tiktoken.Encoding":
+    """Tokenizer for the model, shared process-wide (newer models missing
+    from the installed tiktoken registry fall back to o200k_base)"""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+@functools.lru_cache(maxsize=4096)
+def _truncate_tokens(text: str, cap: int, model_name: str) -> str:
+    """Clip text to at most `cap` tokens, cached per unique input"""
+    encoding = _get_encoding(model_name)
+    tokens = encoding.encode(text)
+    if len(tokens) <= cap:
+        return text
+    return encoding.decode(tokens[:cap])
+
+
+# Matches the short-key scores ("s": 87) as they arrive in a stream
+_SCORE_RE = re.compile(r'"s"\s*:\s*(\d+)')
+
+# Transient transport failures worth retrying. Parse errors are NOT in this
+# list — those genuinely fall back to neutral scores; a 429 or 5xx must not,
+# or it silently corrupts grade analytics with hardcoded 50s
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+_retry_transient = tenacity.retry(
+    retry=tenacity.retry_if_exception_type(_RETRYABLE_ERRORS),
+    wait=tenacity.wait_exponential_jitter(initial=1, max=30),
+    stop=tenacity.stop_after_attempt(5),
+    reraise=True,
+)
+
+# Hard ceiling on a batch call's output-token budget
+_MAX_TOKENS_CEILING = 8192
+
+# Evaluation dimensions in weight/score array order
+DIMENSIONS = ("intent", "vocabulary", "spelling", "grammar")
+
+# Remark tone per percentage band, picked with one bisect instead of an
+# if/elif ladder: < 40, 40-59, 60-74, 75-89, >= 90
+_TONE_BOUNDARIES = (40, 60, 75, 90)
+_TONES = ("Keep practicing!", "Nice try!", "Good effort!", "Great job!", "Excellent work!")
+
+# Short response keys (cheaper output tokens) -> the long keys the rest of
+# the pipeline expects. Translated in Python right after parsing so the
+# downstream dict shape is unchanged.
+_SHORT_KEYS = {
+    "intent": {"s": "score", "u": "understood", "cr": "concepts_right", "cm": "concepts_missed", "n": "note"},
+    "vocabulary": {"s": "score", "gw": "good_words", "im": "improve", "n": "note"},
+    "spelling": {"s": "score", "er": "errors", "pt": "phonetic_tries", "n": "note"},
+    "grammar": {"s": "score", "er": "errors", "st": "strengths", "n": "note"},
+}
+
+
 class EvaluationState(TypedDict):
     """State for evaluation"""
     question_id: str
@@ -43,156 +164,596 @@ class OptimizedAnswerEvaluator:
     Speed: ~4x faster
     Model: GPT-5-mini by default (latest, cheapest, most efficient)
     """
-    
-    def __init__(self, model_name: str = "gpt-5-mini", temperature: float = 0.2):
+
+    # One pooled HTTP/2 connection pool shared by every evaluator instance:
+    # keep-alive connections skip the TCP + TLS handshake (~50-150ms/call)
+    # that otherwise dominates latency for short outputs
+    _http_limits = httpx.Limits(max_connections=64, max_keepalive_connections=64)
+    _http_timeout = httpx.Timeout(30.0)
+    _http_client: httpx.Client = None
+    _http_async_client: httpx.AsyncClient = None
+
+    @classmethod
+    def _get_http_client(cls) -> httpx.Client:
+        if cls._http_client is None:
+            cls._http_client = httpx.Client(
+                http2=True, limits=cls._http_limits, timeout=cls._http_timeout)
+        return cls._http_client
+
+    @classmethod
+    def _get_http_async_client(cls) -> httpx.AsyncClient:
+        if cls._http_async_client is None:
+            cls._http_async_client = httpx.AsyncClient(
+                http2=True, limits=cls._http_limits, timeout=cls._http_timeout)
+        return cls._http_async_client
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared HTTP clients (call once at process shutdown)"""
+        if cls._http_client is not None:
+            cls._http_client.close()
+            cls._http_client = None
+        if cls._http_async_client is not None:
+            await cls._http_async_client.aclose()
+            cls._http_async_client = None
+
+    def __init__(self, model_name: str = "gpt-5-mini", temperature: float = 0.2,
+                 cache_threshold: float = None, escalation_model: str = None,
+                 context_max_chars: int = 500, max_tokens: int = 450):
         """
         Initialize evaluator
-        
+
         Args:
             model_name: "gpt-5-mini" (default, cheapest), "gpt-4o-mini", "gpt-3.5-turbo", or "gpt-4"
             temperature: Lower = more consistent (Note: gpt-5-mini only supports default temperature=1.0)
+            cache_threshold: Enable the semantic cache: paraphrased answers
+                             whose embedding cosine similarity exceeds this
+                             (e.g. 0.97) reuse a previous result. One cheap
+                             embedding call replaces a full evaluation on
+                             hits. None (default) disables it
+            escalation_model: Enable model routing: every answer goes to the
+                              cheap `model_name` first, and only low-confidence
+                              or borderline evaluations are re-graded by this
+                              stronger model (e.g. "gpt-4"). None disables it
+            context_max_chars: Truncate the question context to this many
+                               characters in the prompt — the rubric only
+                               needs the genre/category keywords
+            max_tokens: Output-token cap per submission. The schema bounds
+                        the response size, so over-generation is pure waste
+                        (output tokens cost 2-3x input tokens). Scaled by
+                        batch size for batch calls
         """
         # GPT-5-mini only supports default temperature (1.0)
         if "gpt-5" in model_name:
             temperature = 1.0
-        
-        self.llm = ChatOpenAI(
+
+        self.llm = self._make_llm(model_name, temperature, max_tokens)
+        self.model_name = model_name
+        self.temperature = temperature
+        self.context_max_chars = context_max_chars
+        self.max_tokens = max_tokens
+
+        # Model routing: most answers never need the expensive model
+        self.escalation_model = escalation_model
+        self._strong_llm = (self._make_llm(escalation_model, temperature, max_tokens)
+                            if escalation_model else None)
+        self.escalations = 0
+        self._llm_evaluations = 0
+        # Exact-match response cache: SHA-256 of (model, system, prompt) -> results
+        # Duplicate answers ("yes", empty strings, re-grading runs) skip the API entirely
+        self._cache: Dict[str, List[Dict[str, Any]]] = {}
+
+        # Invariants lifted out of the per-call hot path
+        self._system_msg = _SYSTEM_MSG_CONFIDENCE if escalation_model else _SYSTEM_MSG
+        # Counts answers graded locally without an API call (empty, exact
+        # match, too short) — handy for measuring the fast-path hit rate
+        self.prefilter_hits = 0
+        # Times a response could not be parsed and neutral scores were used
+        self.fallback_count = 0
+
+        # Semantic cache: per-question embedding index over past answers so
+        # paraphrases ("because of rain" vs "since it rained") hit too
+        self.cache_threshold = cache_threshold
+        self.semantic_cache_hits = 0
+        self._embedder = None  # created lazily on first use
+        self._semantic_cache: Dict[str, List[Tuple[np.ndarray, Dict[str, Any]]]] = {}
+        self._default_weights = {"intent": 40, "vocabulary": 25, "spelling": 15, "grammar": 20}
+        self._weights_table = self._build_weights_table()
+
+    @classmethod
+    def _make_llm(cls, model_name: str, temperature: float, max_tokens: int) -> ChatOpenAI:
+        """Build a ChatOpenAI client in JSON mode on the shared HTTP pool"""
+        if "gpt-5" in model_name:
+            temperature = 1.0
+        return ChatOpenAI(
             model=model_name,
             temperature=temperature,
-            api_key=os.getenv("OPENAI_API_KEY")
+            max_tokens=max_tokens,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=cls._get_http_client(),
+            http_async_client=cls._get_http_async_client(),
+            # JSON mode: the API guarantees syntactically valid JSON, so no
+            # markdown-fence stripping is needed client-side
+            model_kwargs={"response_format": {"type": "json_object"}}
         )
-        self.model_name = model_name
+
+    @property
+    def escalation_rate(self) -> float:
+        """Fraction of LLM-graded answers that were re-graded by the strong model"""
+        if self._llm_evaluations == 0:
+            return 0.0
+        return self.escalations / self._llm_evaluations
+
+    def _build_weights_table(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """Precompute weights for every (difficulty, context bucket) combo"""
+        table = {}
+        for difficulty in ("", "easy", "hard"):
+            for bucket in ("", "comprehension", "spelling", "grammar"):
+                weights = dict(self._default_weights)
+                if difficulty == "easy":
+                    weights.update({"spelling": 20, "grammar": 25, "vocabulary": 20, "intent": 35})
+                elif difficulty == "hard":
+                    weights.update({"intent": 50, "vocabulary": 25, "spelling": 10, "grammar": 15})
+                if bucket == "comprehension":
+                    weights.update({"intent": 50, "vocabulary": 25, "spelling": 10, "grammar": 15})
+                elif bucket == "spelling":
+                    weights.update({"spelling": 35, "intent": 30})
+                elif bucket == "grammar":
+                    weights.update({"grammar": 35, "intent": 30})
+                table[(difficulty, bucket)] = weights
+        return table
     
     def evaluate_answer(self, question_data: Dict[str, Any], student_answer: str) -> Dict[str, Any]:
         """
         Evaluate student answer with SINGLE API call
-        
+
         Args:
             question_data: Question info from JSON
             student_answer: Student's text response
-            
+
         Returns:
             Complete evaluation results
         """
-        
-        # Extract data
-        question_id = question_data.get("question_id", "")
-        question_text = question_data.get("question_text", "")
+        return self.evaluate_answers_batch([(question_data, student_answer)])[0]
+
+    def evaluate_answers_batch(self, items: List[Tuple[Dict[str, Any], str]]) -> List[Dict[str, Any]]:
+        """
+        Evaluate MANY student answers with a SINGLE API call
+
+        Packs all submissions into one numbered prompt, so N answers cost
+        1 API round-trip instead of N (huge win on rate-limited endpoints)
+
+        Args:
+            items: List of (question_data, student_answer) pairs
+
+        Returns:
+            List of evaluation results, one per item, same order
+        """
+        if not items:
+            return []
+
+        # Trivial answers (empty, exact match, too short) are graded locally
+        results = [self._prefilter(question_data, student_answer)
+                   for question_data, student_answer in items]
+        remaining = [(i, items[i]) for i, r in enumerate(results) if r is None]
+        if not remaining:
+            return results
+
+        # Semantic cache: one batched embedding call, then reuse results for
+        # near-duplicate answers to the same question
+        answer_vectors: Dict[int, np.ndarray] = {}
+        if self.cache_threshold is not None:
+            vectors = self._embed_answers([answer for _, (_, answer) in remaining])
+            still_remaining = []
+            for (i, (question_data, answer)), vector in zip(remaining, vectors):
+                answer_vectors[i] = vector
+                cached = self._semantic_lookup(question_data.get("question_id", ""), vector)
+                if cached is not None:
+                    results[i] = cached
+                    self.semantic_cache_hits += 1
+                else:
+                    still_remaining.append((i, (question_data, answer)))
+            remaining = still_remaining
+            if not remaining:
+                return results
+
+        llm_items = [item for _, item in remaining]
+        messages = self._build_messages(llm_items)
+
+        # Identical prompt already evaluated? Skip the round-trip
+        cache_key = self._cache_key(messages)
+        if cache_key is not None and cache_key in self._cache:
+            llm_results = self._cache[cache_key]
+        else:
+            # SINGLE API CALL HERE (for ALL submissions)
+            response = self._invoke(self._scale_max_tokens(self.llm, len(llm_items)), messages)
+            self._llm_evaluations += len(llm_items)
+            llm_results = self._fan_out(response.content, llm_items)
+            if self._strong_llm is not None:
+                llm_results = self._escalate_borderline(llm_items, llm_results)
+            if cache_key is not None:
+                self._cache[cache_key] = llm_results
+
+        for (i, (question_data, _)), result in zip(remaining, llm_results):
+            results[i] = result
+            if i in answer_vectors:
+                self._semantic_insert(question_data.get("question_id", ""),
+                                      answer_vectors[i], result)
+        return results
+
+    async def aevaluate_answer(self, question_data: Dict[str, Any], student_answer: str) -> Dict[str, Any]:
+        """
+        Async version of evaluate_answer (awaits the LLM instead of blocking)
+
+        Use with aevaluate_many to overlap many in-flight requests
+        """
+        prefiltered = self._prefilter(question_data, student_answer)
+        if prefiltered is not None:
+            return prefiltered
+
+        items = [(question_data, student_answer)]
+        messages = self._build_messages(items)
+
+        cache_key = self._cache_key(messages)
+        if cache_key is not None and cache_key in self._cache:
+            return self._cache[cache_key][0]
+
+        response = await self._ainvoke(self.llm, messages)
+        self._llm_evaluations += 1
+
+        # Post-processing (parsing, weights, remarks, dict assembly) runs on
+        # a worker thread so it never blocks other in-flight completions
+        results = await asyncio.to_thread(self._fan_out, response.content, items)
+        if self._strong_llm is not None and self._needs_escalation(results[0]):
+            self.escalations += 1
+            response = await self._ainvoke(self._strong_llm, messages)
+            results = await asyncio.to_thread(self._fan_out, response.content, items)
+
+        if cache_key is not None:
+            self._cache[cache_key] = results
+        return results[0]
+
+    async def astream_evaluate_answer(self, question_data: Dict[str, Any], student_answer: str,
+                                      early_abort_floor: int = None) -> Dict[str, Any]:
+        """
+        Evaluate one answer over a token stream, optionally aborting early
+
+        For bulk grading of obviously-wrong or blank answers, once the first
+        two dimension scores are already at/below `early_abort_floor` the
+        final score is decided — stop the stream and stop paying for output
+        tokens (billed at the higher rate)
+
+        Args:
+            question_data: Question info from JSON
+            student_answer: Student's text response
+            early_abort_floor: Abort once the first 2 scores are <= this
+                               value (None = never abort, default)
+
+        Returns:
+            Complete evaluation results (aborted streams report the scores
+            seen so far and 0 for the rest)
+        """
+        prefiltered = self._prefilter(question_data, student_answer)
+        if prefiltered is not None:
+            return prefiltered
+
+        items = [(question_data, student_answer)]
+        messages = self._build_messages(items)
+
+        buffer = []
+        aborted = False
+        async for chunk in self.llm.astream(messages):
+            buffer.append(chunk.content)
+            if early_abort_floor is None:
+                continue
+            scores = _SCORE_RE.findall("".join(buffer))
+            if len(scores) >= 2 and all(int(s) <= early_abort_floor for s in scores[:2]):
+                aborted = True
+                break  # leaving the async-for closes the underlying stream
+
+        content = "".join(buffer)
+        if not aborted:
+            # Keep the event loop free for other in-flight streams
+            results = await asyncio.to_thread(self._fan_out, content, items)
+            return results[0]
+
+        # Partial stream: keep the scores we saw, zero the rest
+        result = {
+            "intent": {"score": 0, "understood": False, "concepts_right": [], "concepts_missed": [], "note": "Stopped early: scores below threshold"},
+            "vocabulary": {"score": 0, "good_words": [], "improve": [], "note": "Stopped early"},
+            "spelling": {"score": 0, "errors": [], "phonetic_tries": [], "note": "Stopped early"},
+            "grammar": {"score": 0, "errors": [], "strengths": [], "note": "Stopped early"}
+        }
+        seen = [int(s) for s in _SCORE_RE.findall(content)]
+        for dimension, score in zip(DIMENSIONS, seen):
+            result[dimension]["score"] = score
+        return await asyncio.to_thread(self._finalize, question_data, result)
+
+    async def aevaluate_many(self, items: List[Tuple[Dict[str, Any], str]],
+                             concurrency: int = 16) -> List[Any]:
+        """
+        Evaluate many answers CONCURRENTLY with asyncio.gather
+
+        Overlaps up to `concurrency` in-flight requests instead of paying
+        network round-trip time N times in sequence
+
+        Args:
+            items: List of (question_data, student_answer) pairs
+            concurrency: Max simultaneous requests (respect your rate limits)
+
+        Returns:
+            List of evaluation results in input order; failed items hold
+            the raised exception instead of a result dict
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _one(question_data: Dict[str, Any], student_answer: str):
+            async with semaphore:
+                return await self.aevaluate_answer(question_data, student_answer)
+
+        tasks = [_one(q, a) for q, a in items]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _scale_max_tokens(self, llm: ChatOpenAI, batch_size: int):
+        """Scale the per-submission output cap by batch size, with a ceiling"""
+        if batch_size <= 1:
+            return llm
+        return llm.bind(max_tokens=min(self.max_tokens * batch_size, _MAX_TOKENS_CEILING))
+
+    @_retry_transient
+    def _invoke(self, llm: ChatOpenAI, messages: List[Any]):
+        """llm.invoke with bounded exponential-backoff retries on 429/5xx"""
+        return llm.invoke(messages)
+
+    @_retry_transient
+    async def _ainvoke(self, llm: ChatOpenAI, messages: List[Any]):
+        """Async twin of _invoke with the same retry policy"""
+        return await llm.ainvoke(messages)
+
+    def _prefilter(self, question_data: Dict[str, Any], student_answer: str) -> Dict[str, Any]:
+        """
+        Grade trivial answers locally without paying for an API call
+
+        Empty answers, answers matching correct_answer (exactly or near-
+        exactly), and very short answers need no LLM judgment. Returns the
+        finished evaluation, or None when the LLM is actually needed
+        """
         correct_answer = question_data.get("correct_answer", {}).get("option_text", "")
-        context = question_data.get("context", "")
-        difficulty = question_data.get("difficulty", "Medium")
-        max_score = question_data.get("max_score", 1)
-        
-        # Single comprehensive prompt
-        prompt = f"""Evaluate this student's answer across 4 dimensions.
-
-QUESTION: {question_text}
-CORRECT ANSWER: {correct_answer}
-STUDENT'S ANSWER: {student_answer}
-DIFFICULTY: {difficulty}
-CONTEXT: {context}
-
-Evaluate on these 4 dimensions:
-
-1. INTENT (Understanding): Did they grasp the main concept? (0-100)
-2. VOCABULARY (Word Choice): Appropriate words for age? (0-100)
-3. SPELLING (Accuracy): Consider phonetic attempts like "becaus"→"because" (0-100)
-4. GRAMMAR (Structure): Sentence structure, tense, agreement (0-100)
-
-Return ONLY valid JSON (no markdown, no explanation):
-{{
-    "intent": {{
-        "score": 0-100,
-        "understood": true/false,
-        "concepts_right": ["list"],
-        "concepts_missed": ["list"],
-        "note": "brief"
-    }},
-    "vocabulary": {{
-        "score": 0-100,
-        "good_words": ["list"],
-        "improve": ["suggestions"],
-        "note": "brief"
-    }},
-    "spelling": {{
-        "score": 0-100,
-        "errors": [{{"word": "wrong", "correct": "right", "type": "phonetic/typo"}}],
-        "phonetic_tries": ["list"],
-        "note": "brief"
-    }},
-    "grammar": {{
-        "score": 0-100,
-        "errors": [{{"type": "error", "fix": "correction"}}],
-        "strengths": ["list"],
-        "note": "brief"
-    }}
-}}"""
-
-        # SINGLE API CALL HERE (instead of 4)
-        messages = [
-            SystemMessage(content="You are an expert child literacy assessor. Return only valid JSON."),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = self.llm.invoke(messages)
-        
-        # Parse response
-        try:
-            # Clean up response (remove markdown code blocks if present)
-            content = response.content.strip()
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
-            
-            result = json.loads(content)
-            
-            # Extract scores
-            intent_score = result.get("intent", {}).get("score", 0)
-            vocab_score = result.get("vocabulary", {}).get("score", 0)
-            spelling_score = result.get("spelling", {}).get("score", 0)
-            grammar_score = result.get("grammar", {}).get("score", 0)
-            
-        except (json.JSONDecodeError, KeyError) as e:
-            # Fallback if JSON parsing fails
+        norm_stu = student_answer.strip().lower()
+        norm_ans = correct_answer.strip().lower()
+
+        if not norm_stu:
             result = {
-                "intent": {"score": 50, "understood": True, "concepts_right": [], "concepts_missed": [], "note": "Parse error"},
-                "vocabulary": {"score": 50, "good_words": [], "improve": [], "note": "Parse error"},
-                "spelling": {"score": 50, "errors": [], "phonetic_tries": [], "note": "Parse error"},
-                "grammar": {"score": 50, "errors": [], "strengths": [], "note": "Parse error"}
+                "intent": {"score": 0, "understood": False, "concepts_right": [], "concepts_missed": [], "note": "Empty answer"},
+                "vocabulary": {"score": 0, "good_words": [], "improve": [], "note": "Empty answer"},
+                "spelling": {"score": 0, "errors": [], "phonetic_tries": [], "note": "Empty answer"},
+                "grammar": {"score": 0, "errors": [], "strengths": [], "note": "Empty answer"}
             }
-            intent_score = vocab_score = spelling_score = grammar_score = 50
-        
-        # Calculate weights based on difficulty
-        weights = self._get_weights(difficulty, context)
-        
-        # Calculate weighted average (0-100 scale)
-        weighted_avg = (
-            (intent_score * weights["intent"]) +
-            (vocab_score * weights["vocabulary"]) +
-            (spelling_score * weights["spelling"]) +
-            (grammar_score * weights["grammar"])
-        ) / 100
-        
-        # Scale to max_score
-        final_score = (weighted_avg / 100) * max_score
-        
-        # Partial scores
-        partial_scores = {
-            "intent": round((intent_score / 100) * (weights["intent"] / 100) * max_score, 2),
-            "vocabulary": round((vocab_score / 100) * (weights["vocabulary"] / 100) * max_score, 2),
-            "spelling": round((spelling_score / 100) * (weights["spelling"] / 100) * max_score, 2),
-            "grammar": round((grammar_score / 100) * (weights["grammar"] / 100) * max_score, 2)
+        elif norm_stu == norm_ans or (
+                norm_ans and difflib.SequenceMatcher(None, norm_stu, norm_ans).ratio() > 0.95):
+            result = {
+                "intent": {"score": 100, "understood": True, "concepts_right": [], "concepts_missed": [], "note": "Matches the correct answer"},
+                "vocabulary": {"score": 100, "good_words": [], "improve": [], "note": "Matches the correct answer"},
+                "spelling": {"score": 100, "errors": [], "phonetic_tries": [], "note": "Matches the correct answer"},
+                "grammar": {"score": 100, "errors": [], "strengths": [], "note": "Matches the correct answer"}
+            }
+        elif len(norm_stu) < 3:
+            # A 1-2 character answer that doesn't match can't show understanding
+            result = {
+                "intent": {"score": 10, "understood": False, "concepts_right": [], "concepts_missed": [], "note": "Answer too short to evaluate"},
+                "vocabulary": {"score": 10, "good_words": [], "improve": [], "note": "Answer too short"},
+                "spelling": {"score": 10, "errors": [], "phonetic_tries": [], "note": "Answer too short"},
+                "grammar": {"score": 10, "errors": [], "strengths": [], "note": "Answer too short"}
+            }
+        else:
+            return None
+
+        self.prefilter_hits += 1
+        return self._finalize(question_data, result)
+
+    @staticmethod
+    def _needs_escalation(summary: Dict[str, Any]) -> bool:
+        """Should this cheap-model evaluation be re-graded by the strong model?"""
+        confidence = summary.get("confidence")
+        if confidence is not None and confidence < 70:
+            return True
+        # Borderline component scores are where cheap models disagree most
+        component_scores = (
+            summary["intent_analysis"]["intent_match_score"],
+            summary["vocabulary_analysis"]["vocabulary_score"],
+            summary["spelling_analysis"]["spelling_score"],
+            summary["grammar_analysis"]["grammar_score"],
+        )
+        return any(55 <= score <= 70 for score in component_scores)
+
+    def _escalate_borderline(self, items: List[Tuple[Dict[str, Any], str]],
+                             results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Re-grade low-confidence/borderline items with the strong model"""
+        flagged = [i for i, summary in enumerate(results) if self._needs_escalation(summary)]
+        if not flagged:
+            return results
+
+        self.escalations += len(flagged)
+        strong_items = [items[i] for i in flagged]
+        response = self._invoke(self._scale_max_tokens(self._strong_llm, len(strong_items)),
+                                self._build_messages(strong_items))
+        for i, strong_result in zip(flagged, self._fan_out(response.content, strong_items)):
+            results[i] = strong_result
+        return results
+
+    def _embed_answers(self, answers: List[str]) -> List[np.ndarray]:
+        """Embed answers (one batched call) and L2-normalize the vectors"""
+        if self._embedder is None:
+            self._embedder = OpenAIEmbeddings(
+                model="text-embedding-3-small",
+                api_key=os.getenv("OPENAI_API_KEY")
+            )
+        vectors = np.asarray(self._embedder.embed_documents(answers), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return list(vectors)
+
+    def _semantic_lookup(self, question_id: str, vector: np.ndarray) -> Dict[str, Any]:
+        """Return a cached result whose answer is near-identical, else None"""
+        bucket = self._semantic_cache.get(question_id)
+        if not bucket:
+            return None
+        # Vectors are normalized, so the dot product is cosine similarity
+        similarities = np.stack([v for v, _ in bucket]) @ vector
+        best = int(similarities.argmax())
+        if similarities[best] >= self.cache_threshold:
+            return bucket[best][1]
+        return None
+
+    def _semantic_insert(self, question_id: str, vector: np.ndarray, result: Dict[str, Any]) -> None:
+        """Add a freshly evaluated answer to this question's cache bucket"""
+        self._semantic_cache.setdefault(question_id, []).append((vector, result))
+
+    def _cache_key(self, messages: List[Any]) -> str:
+        """
+        SHA-256 cache key over (model, system, prompt), or None if uncacheable
+
+        Caching only makes sense for deterministic calls, so temperature > 0
+        disables it
+        """
+        if self.temperature > 0:
+            return None
+        payload = self.model_name + "".join(m.content for m in messages)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _build_messages(self, items: List[Tuple[Dict[str, Any], str]]) -> List[Any]:
+        """Build the system + user messages for a batch of submissions"""
+        # Build one numbered submission block per item
+        submission_blocks = [
+            SUBMISSION_TEMPLATE.substitute(
+                i=i,
+                question=_clean(question_data.get("question_text", "")),
+                correct=_truncate_tokens(
+                    _clean(question_data.get("correct_answer", {}).get("option_text", "")),
+                    _CORRECT_TOKEN_CAP, self.model_name),
+                student=_truncate_tokens(
+                    _clean(student_answer), _ANSWER_TOKEN_CAP, self.model_name),
+                difficulty=_clean(question_data.get("difficulty", "Medium")),
+                context=_truncate_tokens(
+                    _clean(question_data.get("context", ""))[:self.context_max_chars],
+                    _CONTEXT_TOKEN_CAP, self.model_name)
+            )
+            for i, (question_data, student_answer) in enumerate(items, start=1)
+        ]
+
+        # Only the per-call variables go here; the rubric lives in the
+        # constant system prefix so it caches server-side
+        return [
+            self._system_msg,
+            HumanMessage(content="\n\n".join(submission_blocks))
+        ]
+
+    def _fan_out(self, content: str, items: List[Tuple[Dict[str, Any], str]]) -> List[Dict[str, Any]]:
+        """Parse the model's JSON response and map entries back onto the items"""
+        try:
+            # JSON mode guarantees valid JSON, so parse directly
+            parsed = _loads(content)
+            if isinstance(parsed, dict):
+                parsed = parsed.get("results", [parsed])
+            if not isinstance(parsed, list):
+                parsed = [parsed]
+            # Fan results back to items by their "id" field (1-based)
+            results_by_id = {entry.get("id", i + 1): self._expand_keys(entry)
+                             for i, entry in enumerate(parsed)}
+        except (json.JSONDecodeError, KeyError, AttributeError):
+            results_by_id = {}
+
+        pairs = []
+        for i, (question_data, _) in enumerate(items, start=1):
+            entry = results_by_id.get(i)
+            if entry is None:
+                # Hard parse failure: count it so operators can see the rate
+                self.fallback_count += 1
+                entry = self._fallback_result()
+            pairs.append((question_data, entry))
+        return self._finalize_batch(pairs)
+
+    @staticmethod
+    def _expand_keys(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Translate the compact response keys back to the long dict shape"""
+        expanded = {}
+        for dimension, value in entry.items():
+            mapping = _SHORT_KEYS.get(dimension)
+            if mapping and isinstance(value, dict):
+                expanded[dimension] = {mapping.get(k, k): v for k, v in value.items()}
+            elif dimension == "c":
+                expanded["confidence"] = value
+            else:
+                expanded[dimension] = value
+        return expanded
+
+    @staticmethod
+    def _fallback_result() -> Dict[str, Any]:
+        """Neutral per-dimension result used when JSON parsing fails"""
+        return {
+            "intent": {"score": 50, "understood": True, "concepts_right": [], "concepts_missed": [], "note": "Parse error"},
+            "vocabulary": {"score": 50, "good_words": [], "improve": [], "note": "Parse error"},
+            "spelling": {"score": 50, "errors": [], "phonetic_tries": [], "note": "Parse error"},
+            "grammar": {"score": 50, "errors": [], "strengths": [], "note": "Parse error"}
         }
-        
+
+    def _finalize(self, question_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn one parsed per-dimension result into the final evaluation summary"""
+        return self._finalize_batch([(question_data, result)])[0]
+
+    def _finalize_batch(self, pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Turn parsed (question_data, result) pairs into evaluation summaries
+
+        The weighted-score arithmetic runs as one NumPy expression over the
+        whole (N, 4) score matrix instead of a Python loop per answer
+        """
+        fallback = self._fallback_result()
+        score_rows, weight_rows, max_scores = [], [], []
+        for question_data, result in pairs:
+            # Missing dimensions count as the neutral fallback
+            for key in fallback:
+                result.setdefault(key, fallback[key])
+            score_rows.append([result[dim].get("score", 0) for dim in DIMENSIONS])
+            weights = self._get_weights(question_data.get("difficulty", "Medium"),
+                                        question_data.get("context", ""))
+            weight_rows.append([weights[dim] for dim in DIMENSIONS])
+            max_scores.append(question_data.get("max_score", 1))
+
+        # float64 keeps the rounded values identical to the old scalar math
+        scores = np.asarray(score_rows, dtype=np.float64)
+        weights_arr = np.asarray(weight_rows, dtype=np.float64)
+        max_arr = np.asarray(max_scores, dtype=np.float64)
+
+        # Weighted average (0-100 scale), scaled to each max_score
+        weighted_avg = (scores * weights_arr).sum(axis=1) / 100
+        final_scores = weighted_avg / 100 * max_arr
+        partials = scores / 100 * (weights_arr / 100) * max_arr[:, None]
+
+        return [
+            self._build_summary(question_data, result,
+                                float(final_scores[i]),
+                                {dim: round(float(p), 2)
+                                 for dim, p in zip(DIMENSIONS, partials[i])})
+            for i, (question_data, result) in enumerate(pairs)
+        ]
+
+    def _build_summary(self, question_data: Dict[str, Any], result: Dict[str, Any],
+                       final_score: float, partial_scores: Dict[str, float]) -> Dict[str, Any]:
+        """Assemble the evaluation summary dict for one graded answer"""
+        question_id = question_data.get("question_id", "")
+        max_score = question_data.get("max_score", 1)
+        intent_score = result["intent"].get("score", 0)
+        vocab_score = result["vocabulary"].get("score", 0)
+        spelling_score = result["spelling"].get("score", 0)
+        grammar_score = result["grammar"].get("score", 0)
+
         # Generate feedback
         percentage = (final_score / max_score) * 100
         remarks = self._generate_remarks(percentage, result)
         suggestions = self._generate_suggestions(result)
         
         # Build evaluation summary
-        return {
+        summary = {
             "question_id": question_id,
             "final_score": round(final_score, 2),
             "max_score": max_score,
@@ -226,101 +787,81 @@ Return ONLY valid JSON (no markdown, no explanation):
             "remarks": remarks,
             "suggestions": suggestions
         }
-    
+        # Only reported when model routing asked the model for it
+        if "confidence" in result:
+            summary["confidence"] = result["confidence"]
+        return summary
+
     def _get_weights(self, difficulty: str, context: str) -> Dict[str, float]:
-        """Determine scoring weights"""
+        """Determine scoring weights via precomputed table lookup"""
         difficulty = difficulty.lower()
+        if difficulty not in ("easy", "hard"):
+            difficulty = ""
+        key = (difficulty, self._context_bucket(context))
+        return self._weights_table.get(key, self._default_weights)
+
+    @staticmethod
+    def _context_bucket(context: str) -> str:
+        """Map free-text context onto one of the weight-table buckets"""
         context = context.lower()
-        
-        # Default weights
-        weights = {
-            "intent": 40,
-            "vocabulary": 25,
-            "spelling": 15,
-            "grammar": 20
-        }
-        
-        # Adjust by difficulty
-        if difficulty == "easy":
-            weights.update({"spelling": 20, "grammar": 25, "vocabulary": 20, "intent": 35})
-        elif difficulty == "hard":
-            weights.update({"intent": 50, "vocabulary": 25, "spelling": 10, "grammar": 15})
-        
-        # Adjust by context
         if "comprehension" in context or "reading" in context:
-            weights.update({"intent": 50, "vocabulary": 25, "spelling": 10, "grammar": 15})
-        elif "spelling" in context:
-            weights.update({"spelling": 35, "intent": 30})
-        elif "grammar" in context:
-            weights.update({"grammar": 35, "intent": 30})
-        
-        return weights
+            return "comprehension"
+        if "spelling" in context:
+            return "spelling"
+        if "grammar" in context:
+            return "grammar"
+        return ""
     
     def _generate_remarks(self, percentage: float, result: Dict) -> str:
-        """Generate encouraging remarks"""
-        if percentage >= 90:
-            tone = "Excellent work!"
-        elif percentage >= 75:
-            tone = "Great job!"
-        elif percentage >= 60:
-            tone = "Good effort!"
-        elif percentage >= 40:
-            tone = "Nice try!"
-        else:
-            tone = "Keep practicing!"
-        
-        remarks = [tone]
-        
+        """Generate encouraging remarks via tone-table lookup"""
+        remarks = [_TONES[bisect.bisect_right(_TONE_BOUNDARIES, percentage)]]
+
         if result["intent"].get("understood"):
             remarks.append("You understood the main idea.")
-        
+
         if result["spelling"].get("phonetic_tries"):
             remarks.append("Good phonetic spelling attempts!")
-        
+
         return " ".join(remarks)
-    
+
     def _generate_suggestions(self, result: Dict) -> str:
         """Generate constructive suggestions"""
-        suggestions = []
-        
-        # Intent
         missed = result["intent"].get("concepts_missed", [])
-        if missed:
-            suggestions.append(f"Include: {', '.join(missed[:2])}")
-        
-        # Vocabulary
         improve = result["vocabulary"].get("improve", [])
-        if improve:
-            suggestions.append(f"Word tip: {improve[0]}")
-        
-        # Spelling
         errors = result["spelling"].get("errors", [])
-        if errors:
-            err = errors[0]
-            suggestions.append(f"Spelling: '{err.get('word')}' → '{err.get('correct')}'")
-        
-        # Grammar
         grammar_errors = result["grammar"].get("errors", [])
-        if grammar_errors:
-            suggestions.append(f"Grammar: {grammar_errors[0].get('fix', 'Check structure')}")
-        
+
+        candidates = (
+            f"Include: {', '.join(missed[:2])}" if missed else None,
+            f"Word tip: {improve[0]}" if improve else None,
+            f"Spelling: '{errors[0].get('word')}' → '{errors[0].get('correct')}'" if errors else None,
+            f"Grammar: {grammar_errors[0].get('fix', 'Check structure')}" if grammar_errors else None,
+        )
+        suggestions = [s for s in candidates if s]
+
         return " | ".join(suggestions[:3]) if suggestions else "Keep up the good work!"
 
 
+@functools.lru_cache(maxsize=4)
+def _get_evaluator(model_name: str) -> OptimizedAnswerEvaluator:
+    """One shared evaluator per model — construction is not free (client
+    setup, env parsing), and reuse keeps the response caches warm"""
+    return OptimizedAnswerEvaluator(model_name=model_name)
+
+
 # Convenience function
-def quick_evaluate(question_data: Dict[str, Any], student_answer: str, 
+def quick_evaluate(question_data: Dict[str, Any], student_answer: str,
                    use_gpt4: bool = False) -> Dict[str, Any]:
     """
     Quick evaluation function
-    
+
     Args:
         question_data: Question info
         student_answer: Student's answer
         use_gpt4: True for GPT-4 (expensive), False for GPT-5-mini (cheapest, default)
-    
+
     Returns:
         Evaluation results
     """
     model = "gpt-4" if use_gpt4 else "gpt-5-mini"
-    evaluator = OptimizedAnswerEvaluator(model_name=model)
-    return evaluator.evaluate_answer(question_data, student_answer)
+    return _get_evaluator(model).evaluate_answer(question_data, student_answer)